@@ -0,0 +1,30 @@
+import copy
+import threading
+
+
+STATUS = 'status'
+SIGNAL = 'signal'
+NETWORKS = 'networks'
+BSS = 'bss'
+
+
+class State():
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__state = {}
+
+
+    def set(self,key,value):
+        with self.__lock:
+            self.__state[key] = value
+
+
+    def get(self,key):
+        with self.__lock:
+            return copy.deepcopy(self.__state.get(key))
+
+
+    def clear(self,key):
+        with self.__lock:
+            self.__state.pop(key,None)
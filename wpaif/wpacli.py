@@ -11,6 +11,7 @@ STATUS = 'STATUS'
 SIGNAL_POLL = 'SIGNAL_POLL'
 SCAN = 'SCAN'
 SCAN_RESULTS = 'SCAN_RESULTS'
+BSS = 'BSS'
 LIST_NETWORKS = 'LIST_NETWORKS'
 REMOVE_NETWORK = 'REMOVE_NETWORK'
 ADD_NETWORK = 'ADD_NETWORK'
@@ -106,6 +107,10 @@ class WpaCli():
         self.__queue_command((SCAN_RESULTS,None,callback))
 
 
+    def bss(self,bssid,callback=None):
+        self.__queue_command((BSS,[str(bssid)],callback))
+
+
     def list_networks(self,callback=None):
         self.__queue_command((LIST_NETWORKS,None,callback))
 
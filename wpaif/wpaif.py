@@ -8,10 +8,16 @@ import queue
 from project_common.logger import logger
 from project_common.mqtt import Mqtt, mqtt
 from . import wpacli
+from . import state
 from .config import Config
 
 
 ACTION = 'action'
+ID = 'id'
+GET_STATUS = 'GET_STATUS'
+GET_SIGNAL = 'GET_SIGNAL'
+GET_NETWORKS = 'GET_NETWORKS'
+GET_BSS = 'GET_BSS'
 
 
 class WpaIf():
@@ -30,9 +36,12 @@ class WpaIf():
         if WpaIf.__instance is not None:
             raise Exception('Singleton instance already created.')
 
+        self.__state = state.State()
+
         self.__wpa = wpacli.WpaCli(Config.instance().wpa_device())
         self.__wpa.set_command_callback(self.__wpa_callback)
         self.__wpa.start()
+        self.__wpa.list_networks(self.__update_state)
 
         Mqtt.instance().register_on_connect(self.__on_connect)
 
@@ -90,7 +99,47 @@ class WpaIf():
                 logger.warning(f'Received message does not contain the "command" key: "{message.payload}"')
                 return
 
-            self.__command_queue.put(payload)
+            if payload[wpacli.COMMAND] in (GET_STATUS, GET_SIGNAL, GET_NETWORKS, GET_BSS):
+                self.__query(payload,message)
+            else:
+                self.__command_queue.put(payload)
+
+
+    def __query(self,payload,message):
+        # Queries are answered from the state store without a round trip to wpa_supplicant
+        command = payload[wpacli.COMMAND]
+
+        if command == GET_STATUS:
+            result = self.__state.get(state.STATUS)
+
+        elif command == GET_SIGNAL:
+            result = self.__state.get(state.SIGNAL)
+
+        elif command == GET_NETWORKS:
+            result = self.__state.get(state.NETWORKS)
+
+        else:
+            result = self.__state.get(state.BSS)
+
+        response = {wpacli.COMMAND: command, wpacli.RESULT: wpacli.FAIL if result is None else result}
+
+        topic = None
+        try:
+            topic = message.properties.ResponseTopic
+        except AttributeError:
+            pass
+
+        # Correlation data is arbitrary binary so it is returned base64 encoded
+        try:
+            response[ID] = base64.b64encode(message.properties.CorrelationData).decode('ascii')
+        except AttributeError:
+            pass
+
+        # The payload id never overrides the correlation data of a v5 request
+        if ID in payload and not ID in response:
+            response[ID] = payload[ID]
+
+        self.__publish(response,topic)
 
 
     def __wpa_callback(self,result):
@@ -106,23 +155,77 @@ class WpaIf():
             raise KeyError('result is missing the \'result\' key')
 
         if result[wpacli.COMMAND] == wpacli.STATUS:
+            previous = self.__state.get(state.STATUS)
+            self.__update_state(result)
+
             if result[wpacli.RESULT] != 'FAIL':
                 self.__publish(result)
 
-                try:
-                    if result[wpacli.RESULT]['wpa_state'] == 'COMPLETED':
-                        self.__wpa.signal_poll()
-                except:
-                    pass
+                status = result[wpacli.RESULT]
+
+                # The network flags follow the association so refresh them when it changes
+                if self.__state.get(state.NETWORKS) is None or previous is None \
+                    or any(status.get(key) != previous.get(key) for key in ('wpa_state', 'id', wpacli.BSSID)):
+                    self.__wpa.list_networks(self.__update_state)
+
+                if status.get('wpa_state') == 'COMPLETED':
+                    self.__wpa.signal_poll()
+
+                    # A bss for another access point has already been cleared
+                    if wpacli.BSSID in status and self.__state.get(state.BSS) is None:
+                        self.__wpa.bss(status[wpacli.BSSID])
 
         elif result[wpacli.COMMAND] == wpacli.SIGNAL_POLL:
+            self.__update_state(result)
+
             if result[wpacli.RESULT] != 'FAIL':
                 self.__publish(result)
 
+        elif result[wpacli.COMMAND] == wpacli.BSS:
+            self.__update_state(result)
+
         else:
+            self.__update_state(result)
             self.__response_queue.put(result)
 
 
+    def __update_state(self,result):
+        command = result[wpacli.COMMAND]
+        value = result[wpacli.RESULT]
+
+        if command == wpacli.STATUS:
+            if value == wpacli.FAIL:
+                self.__state.clear(state.STATUS)
+                self.__state.clear(state.SIGNAL)
+                self.__state.clear(state.BSS)
+            else:
+                self.__state.set(state.STATUS,value)
+                if value.get('wpa_state') != 'COMPLETED':
+                    self.__state.clear(state.SIGNAL)
+                    self.__state.clear(state.BSS)
+                else:
+                    bss = self.__state.get(state.BSS)
+                    if bss is not None and bss.get(wpacli.BSSID) != value.get(wpacli.BSSID):
+                        self.__state.clear(state.BSS)
+
+        elif command == wpacli.SIGNAL_POLL:
+            if value == wpacli.FAIL:
+                self.__state.clear(state.SIGNAL)
+            else:
+                self.__state.set(state.SIGNAL,value)
+
+        elif command == wpacli.BSS:
+            # An unknown bssid yields an empty response
+            if value == wpacli.FAIL or len(value) == 0:
+                self.__state.clear(state.BSS)
+            else:
+                self.__state.set(state.BSS,value)
+
+        elif command == wpacli.LIST_NETWORKS:
+            if value != wpacli.FAIL:
+                self.__state.set(state.NETWORKS,value)
+
+
     def __status_thread_run(self):
         while not self.__stop_event.is_set():
             self.__wpa.status()
@@ -155,6 +258,11 @@ class WpaIf():
                 logger.warning(f'Received unknown command "{payload[wpacli.COMMAND]}.')
                 continue
 
+            # Refresh the stored network list after a change without waiting on the result,
+            # a failed command may still have been partly applied
+            if payload[wpacli.COMMAND] in (wpacli.SET_NETWORK, wpacli.ENABLE_NETWORK, wpacli.DISABLE_NETWORK):
+                self.__wpa.list_networks(self.__update_state)
+
             try:
                 del response[wpacli.ARGS]
             except:
@@ -298,10 +406,13 @@ class WpaIf():
         return response
 
 
-    def __publish(self,dictionary):
+    def __publish(self,dictionary,topic=None):
+        if topic is None:
+            topic = Config.instance().topic()
+
         try:
             p = json.dumps(dictionary)
-            Mqtt.instance().publish(Config.instance().topic(),payload=p,qos=2)
+            Mqtt.instance().publish(topic,payload=p,qos=2)
             logger.debug(p)
         except Exception as ex:
             logger.warning(ex)